@@ -1,13 +1,204 @@
 import os
-import gradio as gr
-import requests
-import json
-from datetime import datetime
+import sys
+import asyncio
+import hashlib
+import io
+import logging
+import re
+import textwrap
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property, lru_cache
+
+import diskcache
+import httpx
+import numpy as np
+import orjson
+from cachetools import TTLCache
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Divider printed under each analysis section title
+SECTION_DIVIDER = "-" * 50
+
+# Sections to extract and format; each runs from its title line to the next '####' heading.
+# Titles only count at the start of a line (after optional '#', '*', numbering or
+# whitespace), so mentions inside running text do not open a section
+_SECTION_RE = re.compile(
+    r'(?ims)^[ \t#*\d.]*(Potential Disaster Type Classification|Severity Assessment'
+    r'|Recommended Emergency Response|Resource Allocation Suggestions)'
+    r'[^\n]*\n(.*?)(?=####|\Z)'
+)
+
+# (second, formatted string) of the last timestamp, reused within the same second
+_last_ts = (0, "")
+
+
+def _now_str():
+    """
+    Current local time formatted for reports, reformatted at most once per second.
+    
+    Returns:
+        str: Timestamp as 'YYYY-MM-DD HH:MM:SS'
+    """
+    global _last_ts
+    now = int(time.time())
+    last_sec, last_str = _last_ts
+    if now != last_sec:
+        last_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+        # Single tuple assignment so threaded callers never see a mismatched pair
+        _last_ts = (now, last_str)
+    return last_str
+
+
+def _sse_event_data(event):
+    """
+    Extract the data payload of one server-sent event.
+    
+    Args:
+        event (bytes): Event block with '\n' line endings
+    
+    Returns:
+        bytes or None: 'data:' field values joined by newlines, or None if
+        the event has no data field
+    """
+    values = []
+    for line in event.split(b"\n"):
+        if line.startswith(b"data:"):
+            value = line[5:]
+            # A single space after the colon is optional and not part of the value
+            if value.startswith(b" "):
+                value = value[1:]
+            values.append(value)
+    return b"\n".join(values) if values else None
+
+
+@lru_cache(maxsize=256)
+def _format_analysis_body(analysis_text):
+    """
+    Format the sections of an analysis, without the timestamp footer.
+    
+    Output depends only on the analysis text, so cache hits reuse it.
+    
+    Args:
+        analysis_text (str): Raw analysis text from API
+    
+    Returns:
+        str: Formatted report header and sections
+    """
+    def create_section(title, content):
+        """
+        Create a formatted section for the analysis.
+        
+        Args:
+            title (str): Section title
+            content (str): Section content
+        
+        Returns:
+            str: Formatted section
+        """
+        buf = io.StringIO()
+        buf.write(f"🔍 {title.upper()}\n")
+        buf.write(SECTION_DIVIDER)
+        
+        # Process content lines
+        for line in content.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] == '-':
+                buf.write(f"\n   • {line[1:].strip()}")
+            else:
+                buf.write(f"\n   {line}")
+        
+        return buf.getvalue()
+
+    # Build formatted report
+    formatted_report = [
+        "🚨 EMERGENCY RESPONSE ANALYSIS 🚨",
+        "=" * 40
+    ]
+
+    # Extract and format each section in a single pass, keeping the first match per title
+    seen = set()
+    for match in _SECTION_RE.finditer(analysis_text):
+        title, section_content = match.group(1), match.group(2).strip()
+        if title.lower() in seen:
+            continue
+        seen.add(title.lower())
+        formatted_report.append('\n' + create_section(title, section_content))
+
+    return '\n'.join(formatted_report)
+
 
 class EmergencyCore:
     """
     Advanced disaster response system with comprehensive emergency management capabilities.
     """
+
+    # Maximum number of Grok analyses kept in the in-memory LRU cache
+    CACHE_MAXSIZE = 512
+
+    # On-disk cache so analyses survive restarts
+    DISK_CACHE_DIR = "./data/llm_cache"
+    DISK_CACHE_SIZE_LIMIT = 512 * 1024 * 1024
+
+    # Semantic cache settings for paraphrased (near-duplicate) reports
+    SEMANTIC_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    SEMANTIC_THRESHOLD = 0.92
+    SEMANTIC_TTL = 1800
+    SEMANTIC_MAX_ENTRIES = 500
+
+    # Accepted report length range, in characters after stripping whitespace
+    MIN_REPORT_LENGTH = 10
+    MAX_REPORT_LENGTH = 8000
+
+    # Minimum delay between partial updates pushed to the UI while streaming
+    STREAM_UPDATE_INTERVAL = 0.05
+
+    # Analyses Gradio may run at once, so concurrent misses can share a batch
+    ANALYSIS_CONCURRENCY = 16
+
+    # Cache misses arriving within this window are sent as one batched API call.
+    # Batches are capped so the non-streamed reply (BATCH_MAX_SIZE * 500 tokens)
+    # finishes well within BATCH_TIMEOUT
+    BATCH_MAX_SIZE = 4
+    BATCH_WINDOW = 0.05
+    BATCH_TIMEOUT = httpx.Timeout(120, connect=3.05)
+
+    GROK_API_URL = "https://api.x.ai/v1/chat/completions"
+    GROK_MODEL = "grok-beta"
+    _SYSTEM_PROMPT = "You are an advanced AI disaster response coordinator with expertise in emergency management, risk assessment, and humanitarian aid."
+    _BATCH_INSTRUCTIONS = (
+        "The user message is a JSON list of emergency report prompts. Answer each prompt "
+        "as if it were sent on its own, and reply with only a JSON object of the form "
+        '{"analyses": ["<analysis of prompt 1>", "<analysis of prompt 2>", ...]} '
+        "containing exactly one analysis string per prompt, in the same order."
+    )
+    _CODE_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.S)
+
+    # Per-report user prompt, dedented once at import time
+    _PROMPT_TEMPLATE = textwrap.dedent("""
+        Advanced Disaster Analysis Protocol:
+
+        Emergency Report: '{report}'
+        Urgency Level: {urgency}
+
+        Comprehensive Analysis Requirements:
+        1. Identify precise disaster type
+        2. Provide detailed severity assessment
+        3. Outline immediate safety recommendations
+        4. Develop comprehensive emergency response strategy
+        5. Suggest resource allocation and prioritization
+
+        Analyze with scientific precision and humanitarian insight.
+    """).strip()
+
+    # Weather predictions are reused per location for this many seconds
+    WEATHER_CACHE_TTL = 600
+
     
     def __init__(self, api_key):
         """
@@ -17,8 +208,397 @@ class EmergencyCore:
             api_key (str): API key for external service authentication
         """
         self.xai_api_key = api_key
+        self._auth_headers = {
+            "Authorization": f"Bearer {self.xai_api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        self._analysis_cache = OrderedDict()
+        
+        # Embedding model is loaded lazily on the first analysis
+        self._sem_model = None
+        self._sem_enabled = True
+        self._sem_lock = threading.Lock()
+        
+        # Semantic cache stored column-wise as a fixed-size ring buffer; the
+        # embedding matrix is allocated once the embedding size is known
+        self._sem_emb = None
+        self._sem_urgency = np.full(self.SEMANTIC_MAX_ENTRIES, "", dtype=object)
+        self._sem_analysis = [None] * self.SEMANTIC_MAX_ENTRIES
+        self._sem_expires = np.zeros(self.SEMANTIC_MAX_ENTRIES)
+        self._sem_next = 0
+        
+        self._wx_cache = TTLCache(maxsize=1024, ttl=self.WEATHER_CACHE_TTL)
+        
+        # Micro-batcher is started on the first analysis, inside Gradio's event loop
+        self._batch_queue = None
+        self._batcher_task = None
+        # Strong references to in-flight batch calls so they are not garbage collected
+        self._batch_tasks = set()
+
+    @cached_property
+    def _aclient(self):
+        """
+        Shared HTTP/2 client so concurrent reports multiplex over one connection.
+        
+        Built on first use so constructing EmergencyCore stays cheap.
+        """
+        # HTTP/2, pool limits and retries are configured on the transport, which
+        # takes precedence over the equivalent client arguments
+        limits = httpx.Limits(max_keepalive_connections=16, max_connections=32)
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(30, connect=3.05),
+            transport=httpx.AsyncHTTPTransport(http2=True, retries=2, limits=limits)
+        )
+
+    @cached_property
+    def _disk(self):
+        """
+        On-disk analysis cache, opened on first use.
+        """
+        return diskcache.Cache(self.DISK_CACHE_DIR, size_limit=self.DISK_CACHE_SIZE_LIMIT)
+
+    @staticmethod
+    def _cache_key(model, system, prompt_template, max_tokens, report_text, urgency):
+        """
+        Build a deterministic cache key for an analysis request.
+        
+        Every request setting that shapes the analysis is part of the key, so
+        editing the prompt or token budget stops persisted entries from matching.
+        Analyses returned by a batched call are stored under the same key as a
+        single call for that report: the batch sends the identical per-report
+        prompt and only changes how replies are packaged.
+        
+        Args:
+            model (str): Grok model name
+            system (str): System prompt sent with the request
+            prompt_template (str): User prompt template the report is filled into
+            max_tokens (int): Completion token budget
+            report_text (str): Emergency situation description
+            urgency (str): Urgency level of the report
+        
+        Returns:
+            str: SHA-256 hex digest identifying the request
+        """
+        key_data = {
+            "model": model,
+            "system": system,
+            "prompt_template": prompt_template,
+            "max_tokens": max_tokens,
+            "report": report_text,
+            "urgency": urgency
+        }
+        return hashlib.sha256(orjson.dumps(key_data, option=orjson.OPT_SORT_KEYS)).hexdigest()
 
-    def analyze_report(self, report_text, urgency):
+    async def _cache_get(self, key):
+        """
+        Look up a cached analysis in memory, then on disk.
+        
+        Args:
+            key (str): Cache key from _cache_key
+        
+        Returns:
+            str or None: Cached raw analysis, if present
+        """
+        analysis = self._analysis_cache.get(key)
+        if analysis is not None:
+            self._analysis_cache.move_to_end(key)
+            return analysis
+        
+        # diskcache is SQLite-backed; keep opening and querying it off the event loop.
+        # The disk tier is an optimization, so its errors count as a miss
+        try:
+            analysis = await asyncio.to_thread(lambda: self._disk.get(key))
+        except Exception:
+            logger.warning("Disk cache read failed", exc_info=True)
+            return None
+        if analysis is not None:
+            # Promote disk hits so later lookups stay in memory
+            self._memory_put(key, analysis)
+        return analysis
+
+    async def _cache_put(self, key, analysis):
+        """
+        Store a raw analysis in memory and on disk.
+        
+        Args:
+            key (str): Cache key from _cache_key
+            analysis (str): Raw analysis text returned by the API
+        """
+        self._memory_put(key, analysis)
+        try:
+            await asyncio.to_thread(lambda: self._disk.set(key, analysis))
+        except Exception:
+            logger.warning("Disk cache write failed", exc_info=True)
+
+    def _memory_put(self, key, analysis):
+        """
+        Store a raw analysis in memory only, evicting the least recently
+        used entry when full.
+        
+        Args:
+            key (str): Cache key from _cache_key
+            analysis (str): Raw analysis text
+        """
+        self._analysis_cache[key] = analysis
+        self._analysis_cache.move_to_end(key)
+        if len(self._analysis_cache) > self.CACHE_MAXSIZE:
+            self._analysis_cache.popitem(last=False)
+
+    def _embed_report(self, report_text):
+        """
+        Embed a report for semantic cache lookups.
+        
+        Args:
+            report_text (str): Emergency situation description
+        
+        Returns:
+            np.ndarray or None: Normalized embedding, or None if the
+            embedding model is unavailable or encoding failed
+        """
+        if not self._sem_enabled:
+            return None
+        
+        if self._sem_model is None:
+            # Concurrent first requests run in separate worker threads; load the model once
+            with self._sem_lock:
+                if self._sem_model is None and self._sem_enabled:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                        self._sem_model = SentenceTransformer(self.SEMANTIC_MODEL)
+                    except Exception:
+                        # Fall back to exact-match caching only
+                        logger.warning("Semantic cache disabled: could not load %s", self.SEMANTIC_MODEL, exc_info=True)
+                        self._sem_enabled = False
+            if not self._sem_enabled:
+                return None
+        
+        try:
+            return self._sem_model.encode(report_text, normalize_embeddings=True)
+        except Exception:
+            logger.warning("Report embedding failed; skipping semantic cache", exc_info=True)
+            return None
+
+    def _semantic_lookup(self, embedding, urgency):
+        """
+        Find a cached analysis for a semantically similar report.
+        
+        Args:
+            embedding (np.ndarray): Normalized report embedding
+            urgency (str): Urgency level of the report
+        
+        Returns:
+            str or None: Cached raw analysis of the closest match above
+            SEMANTIC_THRESHOLD, if any
+        """
+        if self._sem_emb is None:
+            return None
+        
+        # Only live entries with the same urgency are eligible
+        mask = (self._sem_expires > time.time()) & (self._sem_urgency == urgency)
+        if not mask.any():
+            return None
+        
+        # Embeddings are normalized, so one matrix-vector product gives every cosine similarity
+        sims = self._sem_emb @ embedding.astype(np.float32)
+        sims[~mask] = -1.0
+        best = int(np.argmax(sims))
+        if sims[best] > self.SEMANTIC_THRESHOLD:
+            return self._sem_analysis[best]
+        return None
+
+    def _semantic_store(self, embedding, urgency, analysis):
+        """
+        Add an analysis to the semantic cache, overwriting the oldest entry when full.
+        
+        Args:
+            embedding (np.ndarray): Normalized report embedding
+            urgency (str): Urgency level of the report
+            analysis (str): Raw analysis text returned by the API
+        """
+        if self._sem_emb is None:
+            self._sem_emb = np.zeros((self.SEMANTIC_MAX_ENTRIES, embedding.shape[0]), dtype=np.float32)
+        
+        slot = self._sem_next % self.SEMANTIC_MAX_ENTRIES
+        self._sem_emb[slot] = embedding
+        self._sem_urgency[slot] = urgency
+        self._sem_analysis[slot] = analysis
+        self._sem_expires[slot] = time.time() + self.SEMANTIC_TTL
+        self._sem_next += 1
+
+    async def _submit_to_batcher(self, prompt):
+        """
+        Queue a prompt for the micro-batcher and wait for its analysis.
+        
+        Args:
+            prompt (str): Full user prompt for one emergency report
+        
+        Returns:
+            str or None: Raw analysis from a batched call, or None if the
+            prompt should be sent on its own
+        """
+        if self._batcher_task is None or self._batcher_task.done():
+            self._batch_queue = asyncio.Queue()
+            self._batcher_task = asyncio.create_task(self._batcher())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((prompt, future))
+        return await future
+
+    async def _batcher(self):
+        """
+        Group prompts queued within BATCH_WINDOW into single API calls.
+        
+        A lone prompt resolves to None right away so its caller streams on its
+        own. Larger batches are sent from separate tasks, so the queue keeps
+        draining while earlier batch calls are in flight.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._batch_queue.get()]
+            deadline = loop.time() + self.BATCH_WINDOW
+            while len(batch) < self.BATCH_MAX_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._batch_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            if len(batch) == 1:
+                _, future = batch[0]
+                if not future.done():
+                    future.set_result(None)
+                continue
+            
+            task = asyncio.create_task(self._resolve_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _resolve_batch(self, batch):
+        """
+        Send one batch to the API and resolve each caller's future.
+        
+        A failed batch resolves every future to None so each caller falls back
+        to its own streaming request.
+        
+        Args:
+            batch (list): (prompt, future) pairs collected by the batcher
+        """
+        analyses = [None] * len(batch)
+        try:
+            analyses = await self._analyze_batch([prompt for prompt, _ in batch])
+        except Exception:
+            # Leave every result as None so callers stream individually
+            logger.warning("Batched analysis of %d reports failed; falling back to single calls", len(batch), exc_info=True)
+        
+        for (_, future), analysis in zip(batch, analyses):
+            if not future.done():
+                future.set_result(analysis)
+
+    async def _analyze_batch(self, prompts):
+        """
+        Analyze several emergency reports with one Grok call.
+        
+        Args:
+            prompts (list): Full user prompts, one per report
+        
+        Returns:
+            list: Raw analysis text for each prompt, in order
+        """
+        payload = {
+            "model": self.GROK_MODEL,
+            "max_tokens": 500 * len(prompts),
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {
+                    "role": "system",
+                    "content": f"{self._SYSTEM_PROMPT} {self._BATCH_INSTRUCTIONS}"
+                },
+                {
+                    "role": "user",
+                    "content": orjson.dumps(prompts).decode()
+                }
+            ]
+        }
+        
+        # The whole reply arrives at once, so allow longer than a streamed read
+        response = await self._aclient.post(
+            self.GROK_API_URL,
+            content=orjson.dumps(payload),
+            headers=self._auth_headers,
+            timeout=self.BATCH_TIMEOUT
+        )
+        response.raise_for_status()
+        
+        result = orjson.loads(response.content)
+        return self._parse_batch_content(result['choices'][0]['message']['content'], len(prompts))
+
+    @classmethod
+    def _parse_batch_content(cls, content, count):
+        """
+        Parse the analyses out of a batched completion.
+        
+        Args:
+            content (str): Message content of the batched reply
+            count (int): Number of reports in the batch
+        
+        Returns:
+            list: One analysis string per report, in order
+        
+        Raises:
+            ValueError: If the reply is not valid JSON or does not hold exactly
+            one non-empty analysis string per report
+        """
+        content = content.strip()
+        
+        # Models sometimes wrap JSON in a markdown code fence despite response_format
+        fence = cls._CODE_FENCE_RE.fullmatch(content)
+        if fence:
+            content = fence.group(1)
+        
+        analyses = orjson.loads(content)
+        if isinstance(analyses, dict):
+            analyses = analyses.get("analyses")
+        if not isinstance(analyses, list) or len(analyses) != count:
+            raise ValueError("Batched response does not match the number of reports")
+        if not all(isinstance(analysis, str) and analysis.strip() for analysis in analyses):
+            raise ValueError("Batched response contains a non-text or empty analysis")
+        return analyses
+
+    @staticmethod
+    async def _iter_sse_data(response):
+        """
+        Parse a server-sent event stream straight from the raw response bytes.
+        
+        Args:
+            response (httpx.Response): Streaming API response
+        
+        Yields:
+            bytes: Payload of each 'data:' field, undecoded
+        """
+        buffer = b""
+        pending = b""
+        async for chunk in response.aiter_bytes():
+            pending += chunk
+            # Hold back a trailing '\r' in case its '\n' arrives in the next chunk
+            cut = len(pending) - 1 if pending.endswith(b"\r") else len(pending)
+            buffer += pending[:cut].replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+            pending = pending[cut:]
+            
+            while b"\n\n" in buffer:
+                event, buffer = buffer.split(b"\n\n", 1)
+                data = _sse_event_data(event)
+                if data is not None:
+                    yield data
+        
+        # Flush a final event that was not followed by a blank line
+        data = _sse_event_data(buffer + pending.replace(b"\r", b"\n"))
+        if data is not None:
+            yield data
+
+    async def analyze_report(self, report_text, urgency):
         """
         Enhanced emergency report analysis using Grok API.
         
@@ -26,78 +606,130 @@ class EmergencyCore:
             report_text (str): Detailed emergency situation description
             urgency (str): Urgency level of the report
         
-        Returns:
-            str: Formatted emergency analysis report
+        Yields:
+            str: Partial analysis while the response streams in, then the
+            formatted emergency analysis report
         """
-        if not report_text:
-            return "🚨 Error: Please provide a detailed emergency description."
+        # Reject unusable reports before any cache lookup or API call
+        report_text = (report_text or "").strip()
+        if len(report_text) < self.MIN_REPORT_LENGTH:
+            yield f"🚨 Error: Please provide a detailed emergency description (at least {self.MIN_REPORT_LENGTH} characters)."
+            return
+        if len(report_text) > self.MAX_REPORT_LENGTH:
+            yield f"🚨 Error: Report exceeds {self.MAX_REPORT_LENGTH} characters; please split it into separate reports."
+            return
+        
+        # Normalize so "high", "HIGH" and "High" share cache entries
+        urgency = (urgency or "").strip().title()
 
         try:
-            headers = {
-                "Authorization": f"Bearer {self.xai_api_key}",
-                "Content-Type": "application/json"
+            # Urgency color coding
+            urgency_prefix = {
+                "Low": "🟢",
+                "Medium": "🟠",
+                "High": "🔴"
             }
+            header = f"{urgency_prefix.get(urgency, '🚨')} {urgency.upper()} THREAT LEVEL\n\n"
             
             # Enhanced prompt with more context and specific instructions
-            enhanced_prompt = f"""
-            Advanced Disaster Analysis Protocol:
-            
-            Emergency Report: '{report_text}'
-            Urgency Level: {urgency}
-
-            Comprehensive Analysis Requirements:
-            1. Identify precise disaster type
-            2. Provide detailed severity assessment
-            3. Outline immediate safety recommendations
-            4. Develop comprehensive emergency response strategy
-            5. Suggest resource allocation and prioritization
-
-            Analyze with scientific precision and humanitarian insight.
-            """
+            enhanced_prompt = self._PROMPT_TEMPLATE.format(report=report_text, urgency=urgency)
             
             payload = {
-                "model": "grok-beta",
+                "model": self.GROK_MODEL,
                 "max_tokens": 500,
-                "system": "You are an advanced AI disaster response coordinator with expertise in emergency management, risk assessment, and humanitarian aid.",
                 "messages": [
+                    {
+                        "role": "system",
+                        "content": self._SYSTEM_PROMPT
+                    },
                     {
                         "role": "user",
                         "content": enhanced_prompt
                     }
-                ]
+                ],
+                "stream": True
             }
             
-            response = requests.post(
-                "https://api.x.ai/v1/chat/completions", 
-                headers=headers, 
-                data=json.dumps(payload)
+            # Identical reports skip the API round-trip entirely
+            cache_key = self._cache_key(
+                payload["model"],
+                self._SYSTEM_PROMPT,
+                self._PROMPT_TEMPLATE,
+                payload["max_tokens"],
+                report_text,
+                urgency
             )
+            analysis = await self._cache_get(cache_key)
             
-            if response.status_code == 200:
-                result = response.json()
-                analysis = result['choices'][0]['message']['content']
-                
-                # Urgency color coding
-                urgency_prefix = {
-                    "Low": "🟢",
-                    "Medium": "🟠",
-                    "High": "🔴"
-                }
+            # Paraphrased reports can reuse a prior analysis as well
+            embedding = None
+            if analysis is None:
+                embedding = await asyncio.to_thread(self._embed_report, report_text)
+                if embedding is not None:
+                    # The semantic layer is an optimization; errors fall through to the API
+                    try:
+                        analysis = self._semantic_lookup(embedding, urgency)
+                    except Exception:
+                        logger.warning("Semantic cache lookup failed", exc_info=True)
+                        embedding = None
+                    # Near-match answers belong to another report, so they are not
+                    # promoted into the exact cache; they expire with SEMANTIC_TTL
+            
+            if analysis is None:
+                # Concurrent misses share one batched API call when possible
+                analysis = await self._submit_to_batcher(enhanced_prompt)
+                completed = analysis is not None
                 
-                # Format the analysis
-                formatted_analysis = (
-                    f"{urgency_prefix.get(urgency, '🚨')} {urgency.upper()} THREAT LEVEL\n\n"
-                    f"{self._format_emergency_analysis(analysis)}"
-                )
+                if analysis is None:
+                    async with self._aclient.stream(
+                        "POST",
+                        self.GROK_API_URL,
+                        content=orjson.dumps(payload),
+                        headers=self._auth_headers
+                    ) as response:
+                        if response.status_code != 200:
+                            await response.aread()
+                            yield f"🚨 API Error: {response.status_code} - {response.text}"
+                            return
+                        
+                        # Show raw text as it arrives; formatting runs once at the end
+                        analysis = ""
+                        last_update = time.monotonic()
+                        async for data in self._iter_sse_data(response):
+                            if data == b"[DONE]":
+                                completed = True
+                                break
+                            
+                            choice = orjson.loads(data)['choices'][0]
+                            analysis += (choice.get('delta') or {}).get('content') or ""
+                            if choice.get('finish_reason'):
+                                completed = True
+                            
+                            now = time.monotonic()
+                            if now - last_update >= self.STREAM_UPDATE_INTERVAL:
+                                last_update = now
+                                yield header + analysis
+                    
+                    if not analysis.strip():
+                        yield "🚨 API Error: The analysis service returned an empty response."
+                        return
                 
-                return formatted_analysis
-            else:
-                return f"🚨 API Error: {response.status_code} - {response.text}"
+                # Only complete analyses are cached; truncated streams are shown but not reused
+                if completed:
+                    await self._cache_put(cache_key, analysis)
+                    if embedding is not None:
+                        try:
+                            self._semantic_store(embedding, urgency, analysis)
+                        except Exception:
+                            logger.warning("Semantic cache store failed", exc_info=True)
+            
+            # Format the analysis
+            yield header + self._format_emergency_analysis(analysis)
         
-        except requests.RequestException as e:
-            return f"🚨 Network Error: {str(e)}"
+        except httpx.HTTPError as e:
+            yield f"🚨 Network Error: {str(e)}"
         except Exception as e:
-            return f"🚨 Critical Error: {str(e)}"
+            yield f"🚨 Critical Error: {str(e)}"
 
     def _format_emergency_analysis(self, analysis_text):
         """
@@ -109,63 +741,12 @@ class EmergencyCore:
         Returns:
             str: Formatted analysis report
         """
-        def create_section(title, content):
-            """
-            Create a formatted section for the analysis.
-            
-            Args:
-                title (str): Section title
-                content (str): Section content
-            
-            Returns:
-                str: Formatted section
-            """
-            formatted_lines = [
-                f"🔍 {title.upper()}",
-                "-" * 50
-            ]
-            
-            # Process content lines
-            for line in content.split('\n'):
-                line = line.strip()
-                if line.startswith('-'):
-                    formatted_lines.append(f"   • {line[1:].strip()}")
-                elif line:
-                    formatted_lines.append(f"   {line}")
-            
-            return '\n'.join(formatted_lines)
-
-        # Sections to extract and format
-        sections = [
-            "Potential Disaster Type Classification",
-            "Severity Assessment",
-            "Recommended Emergency Response",
-            "Resource Allocation Suggestions"
-        ]
-
-        # Build formatted report
-        formatted_report = [
-            "🚨 EMERGENCY RESPONSE ANALYSIS 🚨",
-            "=" * 40
-        ]
-
-        # Extract and format each section
-        for section in sections:
-            if section.lower() in analysis_text.lower():
-                # Find the section content
-                start = analysis_text.lower().find(section.lower())
-                end = analysis_text.find('####', start + 1) if analysis_text.find('####', start + 1) != -1 else len(analysis_text)
-                section_content = analysis_text[start:end].split('\n', 1)[1].strip()
-                
-                formatted_report.append('\n' + create_section(section, section_content))
-
-        # Add timestamp and urgency note
-        formatted_report.extend([
-            "\n🕒 Analysis Timestamp: " + datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            "⚠️ URGENT ACTION REQUIRED ⚠️"
-        ])
-
-        return '\n'.join(formatted_report)
+        # Sections are memoized per analysis; only the timestamp footer is rebuilt
+        return (
+            _format_analysis_body(analysis_text)
+            + "\n\n🕒 Analysis Timestamp: " + _now_str()
+            + "\n⚠️ URGENT ACTION REQUIRED ⚠️"
+        )
 
     def weather_prediction(self, location):
         """
@@ -180,6 +761,12 @@ class EmergencyCore:
         if not location:
             return "🌍 Error: Please enter a valid location."
 
+        # Single lookup: the entry may expire between a membership test and a read
+        key = location.lower().strip()
+        cached = self._wx_cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
             # Simulate more comprehensive weather prediction
             weather_risks = {
@@ -191,12 +778,17 @@ class EmergencyCore:
             # Mock risk assessment (in real implementation, use a weather API)
             risk_level = "Moderate"
             
-            return f"""🌦️ Weather Prediction for {location.title()}
+            prediction = f"""🌦️ Weather Prediction for {location.title()}
 Risk Level: {risk_level}
 {weather_risks[risk_level]}
 
-🕒 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+🕒 Generated: {_now_str()}
 ⚠️ Always cross-check with local meteorological services"""
+            
+            # Only successful predictions are cached; once a real weather API
+            # is wired in, cache on HTTP 200 only so failures are retried
+            self._wx_cache[key] = prediction
+            return prediction
         
         except Exception as e:
             return f"🚨 Weather Prediction Error: {str(e)}"
@@ -206,7 +798,7 @@ Risk Level: {risk_level}
         Enhanced image upload and processing.
         
         Args:
-            image (PIL.Image): Uploaded image for damage assessment
+            image (str): Path to the uploaded damage assessment image
         
         Returns:
             str: Image analysis report
@@ -215,12 +807,15 @@ Risk Level: {risk_level}
             return "🖼️ No image uploaded. Please provide a damage assessment image."
 
         try:
-            # Basic image metadata extraction
-            height, width = image.size
+            # Basic image metadata extraction; only the file header is read, pixels stay undecoded
+            with Image.open(image) as img:
+                width, height = img.size
+                image_format = img.format or "Unknown"
             
             return f"""🖼️ Damage Assessment Image Analysis
 Image Uploaded Successfully
 📐 Dimensions: {width} x {height} pixels
+🗂️ Format: {image_format}
 📊 Processing Status: Preliminary assessment in progress
 🔍 Recommendation: Detailed expert evaluation required
 
@@ -236,6 +831,9 @@ Full analysis requires professional on-site inspection."""
       Returns:
           gr.Blocks: Configured Gradio interface
       """
+      # Imported here to keep module import and cold start light
+      import gradio as gr
+
       css = """
       .gradio-container {
           background-color: #f8fafc;
@@ -284,10 +882,13 @@ Full analysis requires professional on-site inspection."""
                           elem_classes=["analysis-output"]
                       )
               
+              # Gradio runs one event at a time by default; allow concurrent
+              # analyses so the micro-batcher can fill a batch
               submit_btn.click(
                   fn=self.analyze_report, 
                   inputs=[report_text, urgency], 
-                  outputs=analysis_output
+                  outputs=analysis_output,
+                  concurrency_limit=self.ANALYSIS_CONCURRENCY
               )
           
           with gr.Tab("Weather Monitoring"):
@@ -305,7 +906,7 @@ Full analysis requires professional on-site inspection."""
           with gr.Tab("Damage Assessment"):
               gr.Markdown("### 🖼️ Upload an Image for Damage Assessment")
               image_upload = gr.Image(
-                  type="pil", 
+                  type="filepath", 
                   label="Upload Damage Image",
                   height=300
               )
@@ -334,8 +935,8 @@ def main():
     """
     Main function to initialize and launch EmergencyCore application.
     """
-    # Replace with your actual Grok API key
-    XAI_API_KEY = "xai-rBOk1AWqTKhnoSYs2N3icYx8aXu6wNDOK5qTapSJaNZz8QWP1zEEU0JflB9RuFuKRLEve2BG8g1kBs3P"
+    # Grok API key is read from the environment so it can be rotated without code changes
+    XAI_API_KEY = os.environ.get("XAI_API_KEY") or sys.exit("XAI_API_KEY not set")
     
     # Create EmergencyCore instance
     emergency_core = EmergencyCore(XAI_API_KEY)
@@ -0,0 +1,232 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import app
+
+
+class FakeStreamResponse:
+    """
+    Minimal stand-in for a streaming httpx.Response.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def aiter_bytes(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class BrokenDisk:
+    """
+    Disk cache whose every operation fails, like a locked or read-only store.
+    """
+
+    def get(self, key):
+        raise OSError("database is locked")
+
+    def set(self, key, value):
+        raise OSError("attempt to write a readonly database")
+
+
+def collect_sse_data(chunks):
+    async def collect():
+        response = FakeStreamResponse(chunks)
+        return [data async for data in app.EmergencyCore._iter_sse_data(response)]
+
+    return asyncio.run(collect())
+
+
+def collect_report(core, report_text, urgency):
+    async def collect():
+        return [output async for output in core.analyze_report(report_text, urgency)]
+
+    return asyncio.run(collect())
+
+
+@pytest.fixture
+def core(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.EmergencyCore, "DISK_CACHE_DIR", str(tmp_path / "llm_cache"))
+    return app.EmergencyCore("test-key")
+
+
+def unit_vector(index, dim=4):
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[index] = 1.0
+    return vector
+
+
+# Server-sent event parsing
+
+def test_sse_events_split_across_chunks():
+    chunks = [b'data: {"a":1}\n', b'\ndata: {"b"', b':2}\n\ndata: [DONE]\n\n']
+    assert collect_sse_data(chunks) == [b'{"a":1}', b'{"b":2}', b"[DONE]"]
+
+
+def test_sse_crlf_line_endings():
+    chunks = [b'data: {"a":1}\r\n\r\ndata: [DONE]\r\n\r\n']
+    assert collect_sse_data(chunks) == [b'{"a":1}', b"[DONE]"]
+
+
+def test_sse_crlf_split_between_chunks():
+    chunks = [b'data: {"a":1}\r', b'\n\r', b'\ndata: [DONE]\r\n\r\n']
+    assert collect_sse_data(chunks) == [b'{"a":1}', b"[DONE]"]
+
+
+def test_sse_data_without_space_and_comment_lines():
+    chunks = [b': keep-alive\n\ndata:{"a":1}\n\n']
+    assert collect_sse_data(chunks) == [b'{"a":1}']
+
+
+def test_sse_trailing_event_without_blank_line():
+    chunks = [b'data: {"a":1}\n\ndata: [DONE]']
+    assert collect_sse_data(chunks) == [b'{"a":1}', b"[DONE]"]
+
+
+# Batched reply parsing
+
+def test_batch_content_wrapped_object():
+    content = '{"analyses": ["first", "second"]}'
+    assert app.EmergencyCore._parse_batch_content(content, 2) == ["first", "second"]
+
+
+def test_batch_content_code_fence_and_bare_list():
+    content = '```json\n["first", "second"]\n```'
+    assert app.EmergencyCore._parse_batch_content(content, 2) == ["first", "second"]
+
+
+@pytest.mark.parametrize("content", [
+    '{"analyses": ["only one"]}',
+    '{"analyses": ["first", {"text": "second"}]}',
+    '{"analyses": ["first", "  "]}',
+    '{"result": ["first", "second"]}',
+    "not json at all",
+])
+def test_batch_content_rejects_mismatched_replies(content):
+    with pytest.raises(ValueError):
+        app.EmergencyCore._parse_batch_content(content, 2)
+
+
+# Input guard and urgency normalization
+
+def test_short_and_long_reports_are_rejected_without_lookups(core, monkeypatch):
+    async def fail_cache_get(key):
+        raise AssertionError("cache must not be consulted")
+
+    monkeypatch.setattr(core, "_cache_get", fail_cache_get)
+
+    short = collect_report(core, "   fire   ", "High")
+    long = collect_report(core, "x" * (app.EmergencyCore.MAX_REPORT_LENGTH + 1), "High")
+
+    assert len(short) == 1 and "at least 10 characters" in short[0]
+    assert len(long) == 1 and "exceeds 8000 characters" in long[0]
+
+
+def test_urgency_is_normalized_before_cache_lookup(core, monkeypatch):
+    keys = []
+
+    async def fake_cache_get(key):
+        keys.append(key)
+        return "#### Severity Assessment\n- High"
+
+    monkeypatch.setattr(core, "_cache_get", fake_cache_get)
+
+    first = collect_report(core, "Building on fire at 5th avenue", "  high ")
+    second = collect_report(core, "Building on fire at 5th avenue  ", "HIGH")
+
+    assert keys[0] == keys[1]
+    assert first[-1].startswith("🔴 HIGH THREAT LEVEL")
+    assert "🔍 SEVERITY ASSESSMENT" in first[-1]
+    assert second[-1].startswith("🔴 HIGH THREAT LEVEL")
+
+
+# Exact-match cache
+
+def test_cache_key_covers_every_request_setting():
+    base = ("grok-beta", "system", "template {report}", 500, "report text", "High")
+    key = app.EmergencyCore._cache_key(*base)
+
+    assert key == app.EmergencyCore._cache_key(*base)
+    for index, changed in enumerate(["grok-2", "other system", "new template", 600, "other report", "Low"]):
+        variant = list(base)
+        variant[index] = changed
+        assert app.EmergencyCore._cache_key(*variant) != key
+
+
+def test_memory_cache_evicts_least_recently_used(core, monkeypatch):
+    monkeypatch.setattr(core, "CACHE_MAXSIZE", 2)
+    monkeypatch.setattr(core, "_disk", BrokenDisk())
+
+    core._memory_put("a", "analysis a")
+    core._memory_put("b", "analysis b")
+    assert asyncio.run(core._cache_get("a")) == "analysis a"
+    core._memory_put("c", "analysis c")
+
+    assert list(core._analysis_cache) == ["a", "c"]
+
+
+def test_disk_cache_survives_a_new_instance(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.EmergencyCore, "DISK_CACHE_DIR", str(tmp_path / "llm_cache"))
+
+    asyncio.run(app.EmergencyCore("test-key")._cache_put("key", "persisted analysis"))
+    restarted = app.EmergencyCore("test-key")
+
+    assert asyncio.run(restarted._cache_get("key")) == "persisted analysis"
+    assert restarted._analysis_cache["key"] == "persisted analysis"
+
+
+def test_disk_cache_failures_are_treated_as_misses(core, monkeypatch):
+    monkeypatch.setattr(core, "_disk", BrokenDisk())
+
+    asyncio.run(core._cache_put("key", "analysis"))
+    core._analysis_cache.clear()
+
+    assert asyncio.run(core._cache_get("key")) is None
+
+
+# Semantic ring buffer
+
+def test_semantic_lookup_matches_same_urgency_only(core):
+    core._semantic_store(unit_vector(0), "High", "analysis zero")
+    core._semantic_store(unit_vector(1), "High", "analysis one")
+
+    assert core._semantic_lookup(unit_vector(1), "High") == "analysis one"
+    assert core._semantic_lookup(unit_vector(1), "Low") is None
+    assert core._semantic_lookup(unit_vector(2), "High") is None
+
+
+def test_semantic_ring_buffer_overwrites_oldest_entry(monkeypatch):
+    monkeypatch.setattr(app.EmergencyCore, "SEMANTIC_MAX_ENTRIES", 2)
+    core = app.EmergencyCore("test-key")
+
+    core._semantic_store(unit_vector(0), "High", "analysis zero")
+    core._semantic_store(unit_vector(1), "High", "analysis one")
+    core._semantic_store(unit_vector(2), "High", "analysis two")
+
+    assert core._semantic_lookup(unit_vector(0), "High") is None
+    assert core._semantic_lookup(unit_vector(1), "High") == "analysis one"
+    assert core._semantic_lookup(unit_vector(2), "High") == "analysis two"
+
+
+def test_semantic_entries_expire(core):
+    core._semantic_store(unit_vector(0), "High", "analysis zero")
+    core._sem_expires[0] = 0
+
+    assert core._semantic_lookup(unit_vector(0), "High") is None
+
+
+# Analysis formatting
+
+def test_section_mentions_in_text_do_not_open_sections():
+    analysis = (
+        "#### Immediate Safety\n"
+        "Given the severity assessment above, evacuate.\n"
+        "#### Severity Assessment\n"
+        "- High\n"
+    )
+    body = app._format_analysis_body(analysis)
+
+    assert body.count("🔍 SEVERITY ASSESSMENT") == 1
+    assert "   • High" in body